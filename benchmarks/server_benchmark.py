@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Desktop Monitor Server Benchmark
+Drives concurrent load against the MonitorHandler endpoints /metrics, /files/list,
+/files/download, /files/upload, /desktop/screenshot, /desktop/mouse and
+/desktop/keyboard (not /shutdown), and reports throughput, p50/p99 latency and
+peak server RSS as JSON.
+
+The server runs in a child process with stub capture/input backends, so no
+display is needed. Each scenario gets a fresh server so peak RSS is per scenario.
+
+Usage:
+    python3 benchmarks/server_benchmark.py [--scenarios metrics,list,download,upload,screenshot,mouse,keyboard]
+        [--concurrency 1,4] [--requests 50] [--transfer-requests 3]
+        [--list-sizes 10k,100k,1M] [--file-sizes 1M,64M,2G]
+        [--work-dir DIR] [--output results.json]
+"""
+
+import argparse
+import base64
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ['metrics', 'list', 'download', 'upload', 'screenshot', 'mouse', 'keyboard']
+# Multiple of 3, so base64 of consecutive blocks concatenates without padding
+UPLOAD_BLOCK_SIZE = 3 * 2 ** 18
+
+
+def parse_quantity(text, base):
+    """Parse '10k', '1M', '2G' or a plain integer (base 1000 for counts, 1024 for bytes)"""
+    text = text.strip()
+    multipliers = {'k': base, 'm': base ** 2, 'g': base ** 3}
+    suffix = text[-1:].lower()
+    if suffix in multipliers:
+        value = int(float(text[:-1]) * multipliers[suffix])
+    else:
+        value = int(text)
+    if value <= 0:
+        raise ValueError(f'{text} must be positive')
+    return value
+
+
+def parse_list(text, convert):
+    return [convert(part) for part in text.split(',') if part.strip()]
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f'{text} must be a positive integer')
+    return value
+
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f'{text} must not be negative')
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs in the child process started with --serve)
+# ---------------------------------------------------------------------------
+
+def install_stub_backends(screen_width, screen_height):
+    """Replace pyautogui and ImageGrab so the server runs without a display"""
+    stub = types.ModuleType('pyautogui')
+    for name in ('moveTo', 'click', 'doubleClick', 'scroll', 'write', 'press'):
+        setattr(stub, name, lambda *args, **kwargs: None)
+    sys.modules['pyautogui'] = stub
+
+    sys.path.insert(0, REPO_ROOT)
+    import desktop_monitor_server as server
+    from PIL import Image
+
+    # Seeded noise is the worst case for JPEG and identical on every run
+    rng = random.Random(0)
+    frame = Image.frombytes(
+        'RGB',
+        (screen_width, screen_height),
+        rng.randbytes(screen_width * screen_height * 3)
+    )
+    # handle_screenshot thumbnails in place, so hand out a fresh copy each time
+    server.ImageGrab = types.SimpleNamespace(grab=lambda *args, **kwargs: frame.copy())
+    return server
+
+
+def serve(args):
+    width, height = (int(v) for v in args.screen.lower().split('x'))
+    server = install_stub_backends(width, height)
+    server.FILES_ROOT = os.path.abspath(args.files_root)
+    # Per-request logging to stdout would dominate small requests
+    server.MonitorHandler.log_message = lambda self, format, *log_args: None
+
+    httpd = server.HTTPServer(('127.0.0.1', 0), server.MonitorHandler)
+    print(httpd.server_address[1], flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+class ServerProcess:
+    """Fresh benchmark server in a child process"""
+
+    def __init__(self, files_root, screen):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve',
+             '--files-root', files_root, '--screen', screen],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        line = self.proc.stdout.readline()
+        if not line:
+            self.proc.wait()
+            self.proc.stdout.close()
+            raise RuntimeError('Benchmark server failed to start')
+        self.port = int(line)
+
+    def peak_rss_kb(self):
+        """Peak resident set size of the server (VmHWM), None if unavailable"""
+        try:
+            with open(f'/proc/{self.proc.pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc.stdout.close()
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def make_list_tree(files_root, count):
+    """Directory with `count` entries (every 10th a subdirectory), reused across runs"""
+    name = f'list-{count}'
+    path = os.path.join(files_root, name)
+    done_marker = os.path.join(files_root, f'.{name}.done')
+    if os.path.exists(done_marker):
+        return '/' + name
+
+    print(f'Creating {count} entries in {path}...', file=sys.stderr)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    for i in range(count):
+        entry = os.path.join(path, f'entry-{i:07d}')
+        if i % 10 == 0:
+            os.mkdir(entry)
+        else:
+            with open(entry, 'wb') as f:
+                f.write(b'x' * (i % 4096))
+    open(done_marker, 'w').close()
+    return '/' + name
+
+
+def make_download_file(files_root, size):
+    """Sparse file of `size` bytes, reused across runs"""
+    path = os.path.join(files_root, f'download-{size}.bin')
+    if not os.path.exists(path) or os.path.getsize(path) != size:
+        with open(path, 'wb') as f:
+            f.truncate(size)
+    return '/' + os.path.basename(path)
+
+
+def make_upload_body(files_root, size):
+    """JSON upload body file carrying `size` bytes, reused across runs.
+
+    The payload repeats one seeded block, so it is identical on every run and
+    is streamed to disk without ever holding the whole body in memory.
+    Returns (path, length in bytes).
+    """
+    prefix = b'{"filename": "upload.bin", "data": "'
+    suffix = b'"}'
+    full_blocks, tail = divmod(size, UPLOAD_BLOCK_SIZE)
+    block = random.Random(0).randbytes(UPLOAD_BLOCK_SIZE)
+    encoded_block = base64.b64encode(block)
+    encoded_tail = base64.b64encode(block[:tail])
+    length = len(prefix) + full_blocks * len(encoded_block) + len(encoded_tail) + len(suffix)
+
+    path = os.path.join(files_root, f'.upload-{size}.json')
+    if os.path.exists(path) and os.path.getsize(path) == length:
+        return path, length
+
+    with open(path, 'wb') as f:
+        f.write(prefix)
+        for _ in range(full_blocks):
+            f.write(encoded_block)
+        f.write(encoded_tail)
+        f.write(suffix)
+    return path, length
+
+
+# ---------------------------------------------------------------------------
+# Load driver
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def to_ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def run_load(port, method, path_for, body, concurrency, total_requests, timeout):
+    """Issue `total_requests` requests from `concurrency` threads.
+
+    `path_for(worker)` returns the request path for a given worker index.
+    `body` is None, bytes, or a (path, length) tuple streamed from disk.
+    Only successful (200) requests contribute latencies and bytes.
+    Returns (latencies in seconds, error count, bytes transferred, wall time).
+    """
+    latencies = []
+    errors = [0]
+    transferred = [0]
+    remaining = [total_requests]
+    lock = threading.Lock()
+
+    if body is None:
+        headers, body_length = {}, 0
+    else:
+        body_length = body[1] if isinstance(body, tuple) else len(body)
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(body_length)}
+
+    def worker(index):
+        path = path_for(index)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+
+            # The server speaks HTTP/1.0, so every request needs its own connection
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+            body_file = open(body[0], 'rb') if isinstance(body, tuple) else None
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body_file or body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                payload = b''
+                ok = False
+            finally:
+                conn.close()
+                if body_file:
+                    body_file.close()
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                    transferred[0] += body_length + len(payload)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    return latencies, errors[0], transferred[0], wall
+
+
+def measure(args, files_root, record, name, params, method, path_for, body=None, requests=None):
+    """Run one scenario at every concurrency level against a fresh server each time"""
+    requests = requests or args.requests
+    for concurrency in args.concurrency:
+        result = {
+            'scenario': name,
+            'params': params,
+            'concurrency': concurrency,
+        }
+        try:
+            server = ServerProcess(files_root, args.screen)
+            try:
+                if args.warmup:
+                    run_load(server.port, method, path_for, body, 1, args.warmup, args.timeout)
+                latencies, errors, transferred, wall = run_load(
+                    server.port, method, path_for, body, concurrency, requests, args.timeout
+                )
+                peak_rss = server.peak_rss_kb()
+            finally:
+                server.stop()
+        except Exception as e:
+            traceback.print_exc()
+            result['error'] = f'{type(e).__name__}: {e}'
+            record(result)
+            continue
+
+        latencies.sort()
+        ok = len(latencies)
+        result.update({
+            'requests': requests,
+            'successful': ok,
+            'errors': errors,
+            'duration_s': round(wall, 6),
+            'throughput_rps': round(ok / wall, 3) if ok else None,
+            'throughput_mb_s': round(transferred / wall / 2 ** 20, 3) if ok else None,
+            'latency_ms': {
+                'p50': to_ms(percentile(latencies, 50)),
+                'p99': to_ms(percentile(latencies, 99)),
+                'min': to_ms(latencies[0] if ok else None),
+                'max': to_ms(latencies[-1] if ok else None),
+                'mean': to_ms(sum(latencies) / ok if ok else None),
+            },
+            'peak_rss_kb': peak_rss,
+        })
+        print(
+            f"{name} {params} c={concurrency}: {result['throughput_rps']} req/s, "
+            f"p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms, "
+            f"peak RSS {peak_rss} kB, errors {errors}",
+            file=sys.stderr
+        )
+        record(result)
+
+
+def run_benchmarks(args, files_root, record):
+    """Run every selected scenario, recording a failed fixture as an error entry"""
+
+    def attempt(name, params, run):
+        try:
+            run()
+        except Exception as e:
+            traceback.print_exc()
+            record({'scenario': name, 'params': params, 'error': f'{type(e).__name__}: {e}'})
+
+    for scenario in args.scenarios:
+        if scenario == 'metrics':
+            attempt('metrics', {}, lambda: measure(
+                args, files_root, record, 'metrics', {}, 'GET',
+                lambda worker: '/metrics'))
+
+        elif scenario == 'list':
+            for count in args.list_sizes:
+                def run(count=count):
+                    path = make_list_tree(files_root, count)
+                    measure(args, files_root, record, 'list', {'entries': count}, 'GET',
+                            lambda worker: f'/files/list?path={path}')
+                attempt('list', {'entries': count}, run)
+
+        elif scenario == 'download':
+            for size in args.file_sizes:
+                def run(size=size):
+                    path = make_download_file(files_root, size)
+                    measure(args, files_root, record, 'download', {'bytes': size}, 'GET',
+                            lambda worker: f'/files/download?path={path}',
+                            requests=args.transfer_requests)
+                attempt('download', {'bytes': size}, run)
+
+        elif scenario == 'upload':
+            for size in args.file_sizes:
+                def run(size=size):
+                    body = make_upload_body(files_root, size)
+                    # One target directory per worker so concurrent writes don't collide
+                    measure(args, files_root, record, 'upload', {'bytes': size}, 'POST',
+                            lambda worker: f'/files/upload?path=/uploads/worker-{worker}',
+                            body=body, requests=args.transfer_requests)
+                attempt('upload', {'bytes': size}, run)
+
+        elif scenario == 'screenshot':
+            attempt('screenshot', {'screen': args.screen}, lambda: measure(
+                args, files_root, record, 'screenshot', {'screen': args.screen}, 'GET',
+                lambda worker: '/desktop/screenshot'))
+
+        elif scenario == 'mouse':
+            body = json.dumps({'action': 'click', 'x': 100, 'y': 100}).encode()
+            attempt('mouse', {}, lambda: measure(
+                args, files_root, record, 'mouse', {}, 'POST',
+                lambda worker: '/desktop/mouse', body=body))
+
+        elif scenario == 'keyboard':
+            body = json.dumps({'key': 'enter'}).encode()
+            attempt('keyboard', {}, lambda: measure(
+                args, files_root, record, 'keyboard', {}, 'POST',
+                lambda worker: '/desktop/keyboard', body=body))
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def write_report(report, output):
+    """Write the report to `output`, replacing the previous copy atomically"""
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps(report, indent=2) + '\n')
+    os.replace(tmp_path, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load and latency benchmark for the Desktop Monitor Server')
+    parser.add_argument('--scenarios', type=lambda s: parse_list(s, str.strip), default=SCENARIOS,
+                        help=f'Comma-separated scenarios to run (default: {",".join(SCENARIOS)})')
+    parser.add_argument('--concurrency', type=lambda s: parse_list(s, positive_int), default=[1, 4],
+                        help='Comma-separated concurrent client counts (default: 1,4)')
+    parser.add_argument('--requests', type=positive_int, default=50,
+                        help='Requests per run for metrics, list, screenshot, mouse and keyboard (default: 50)')
+    parser.add_argument('--transfer-requests', type=positive_int, default=3,
+                        help='Requests per run for download and upload (default: 3)')
+    parser.add_argument('--warmup', type=non_negative_int, default=1,
+                        help='Untimed requests before each run (default: 1)')
+    parser.add_argument('--list-sizes', type=lambda s: parse_list(s, lambda v: parse_quantity(v, 1000)),
+                        default=[10000, 100000, 1000000],
+                        help='Comma-separated directory entry counts (default: 10k,100k,1M)')
+    parser.add_argument('--file-sizes', type=lambda s: parse_list(s, lambda v: parse_quantity(v, 1024)),
+                        default=[2 ** 20, 64 * 2 ** 20, 2 * 2 ** 30],
+                        help='Comma-separated transfer sizes in bytes (default: 1M,64M,2G)')
+    parser.add_argument('--screen', type=str, default='1920x1080',
+                        help='Size of the stub screen capture (default: 1920x1080)')
+    parser.add_argument('--timeout', type=float, default=600,
+                        help='Per-request timeout in seconds (default: 600)')
+    parser.add_argument('--work-dir', type=str,
+                        help='Directory for fixtures, kept and reused between runs '
+                             '(default: temporary directory under the current directory)')
+    parser.add_argument('--output', type=str,
+                        help='Write JSON results here, updated after every run (default: stdout at the end)')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--files-root', type=str, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(unknown)}')
+
+    if args.work_dir:
+        files_root = os.path.abspath(os.path.expanduser(args.work_dir))
+        os.makedirs(files_root, exist_ok=True)
+    else:
+        # Not the system temp dir: /tmp is often tmpfs, and the fixtures run to
+        # several GB that would then compete with the server for RAM
+        files_root = tempfile.mkdtemp(prefix='desktop-monitor-bench-', dir=os.getcwd())
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'transfer_requests': args.transfer_requests,
+            'warmup': args.warmup,
+            'screen': args.screen,
+        },
+        'results': [],
+    }
+
+    def record(result):
+        report['results'].append(result)
+        if args.output:
+            write_report(report, args.output)
+
+    try:
+        run_benchmarks(args, files_root, record)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(files_root, ignore_errors=True)
+        if args.output:
+            write_report(report, args.output)
+        else:
+            print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()